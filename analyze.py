@@ -1,38 +1,89 @@
 import tensorflow as tf
 import numpy as np
-import librosa
-import tensorflow_hub as hub
-import pandas as pd
+import soundfile as sf
 import os
-from typing import Optional, Tuple
+import csv
+import glob
+import hashlib
+import tempfile
+import zipfile
+import threading
+from typing import Optional, List
 import streamlit as st
 
-# Global variables for caching
-_yamnet_model = None
-_class_names = None
+# Loading and resampling are shared with the simple analyzer, so both use
+# one decode cache; its metadata and quality analysis (and their compiled
+# kernels) are re-exported unchanged
+from analyze_simple import (
+    load_audio, resample_audio,
+    get_audio_metadata, get_audio_metadata_from_array,
+    analyze_audio_quality, analyze_audio_quality_from_array
+)
 
-def _load_yamnet_model():
-    """Load YAMNet model with caching"""
-    global _yamnet_model, _class_names
-    
-    if _yamnet_model is None:
-        try:
-            # Load YAMNet model from TensorFlow Hub
-            yamnet_model_handle = 'https://tfhub.dev/google/yamnet/1'
-            _yamnet_model = hub.load(yamnet_model_handle)
-            
-            # Load class map
-            class_map_path = tf.keras.utils.get_file(
-                'yamnet_class_map.csv',
-                'https://raw.githubusercontent.com/tensorflow/models/master/research/audioset/yamnet/yamnet_class_map.csv'
-            )
-            _class_names = pd.read_csv(class_map_path)['display_name'].tolist()
-            
-        except Exception as e:
-            st.error(f"Failed to load YAMNet model: {e}")
-            raise e
+# Streaming resampling of files too long to decode whole needs soxr
+try:
+    import soxr
+    SOXR_AVAILABLE = True
+except ImportError:
+    SOXR_AVAILABLE = False
+
+# YAMNet TFLite classifier consumes fixed 0.975 s windows at 16 kHz
+YAMNET_TFLITE_URL = 'https://tfhub.dev/google/lite-model/yamnet/classification/tflite/1?lite-format=tflite'
+YAMNET_WINDOW_SAMPLES = 15600
+
+# Number of per-file score caches kept in the temp directory
+YAMNET_SCORE_CACHE_SIZE = 64
+
+# The cached interpreter is shared by every session; TFLite invocations aren't thread-safe
+_yamnet_lock = threading.Lock()
+
+# Reusable input tensor, filled in place for each window (guarded by _yamnet_lock).
+# Shaped from the model's declared input when the interpreter is loaded
+_INPUT_BUF: Optional[np.ndarray] = None
+
+@st.cache_resource(show_spinner=False)
+def _get_yamnet():
+    """Load the YAMNet TFLite interpreter and class names once per process"""
+    try:
+        # Load YAMNet TFLite model from TensorFlow Hub
+        model_path = tf.keras.utils.get_file(
+            'lite-model_yamnet_classification_tflite_1.tflite',
+            YAMNET_TFLITE_URL
+        )
+        interpreter = tf.lite.Interpreter(
+            model_path=model_path,
+            num_threads=os.cpu_count()
+        )
+        
+        # The graph declares a fixed single-window input ([15600]); plan for it
+        # as-is once, and size the reusable buffer to match
+        global _INPUT_BUF
+        input_details = interpreter.get_input_details()[0]
+        interpreter.allocate_tensors()
+        _INPUT_BUF = np.zeros(input_details['shape'], dtype=input_details['dtype'])
+        
+        # Load class map
+        class_map_path = tf.keras.utils.get_file(
+            'yamnet_class_map.csv',
+            'https://raw.githubusercontent.com/tensorflow/models/master/research/audioset/yamnet/yamnet_class_map.csv'
+        )
+        with open(class_map_path, newline='') as f:
+            reader = csv.reader(f)
+            display_idx = next(reader).index('display_name')
+            class_names = np.array([row[display_idx] for row in reader])
+        
+    except Exception as e:
+        st.error(f"Failed to load YAMNet model: {e}")
+        raise e
     
-    return _yamnet_model, _class_names
+    return interpreter, class_names
+
+def _frame_waveform(waveform: np.ndarray) -> np.ndarray:
+    """Split a waveform into zero-padded YAMNet windows of shape (n, 15600)"""
+    n_windows = max(1, -(-len(waveform) // YAMNET_WINDOW_SAMPLES))
+    padded = np.zeros(n_windows * YAMNET_WINDOW_SAMPLES, dtype=np.float32)
+    padded[:len(waveform)] = waveform
+    return padded.reshape(n_windows, YAMNET_WINDOW_SAMPLES)
 
 def analyze_audio(file_path: str) -> str:
     """
@@ -49,127 +100,276 @@ def analyze_audio(file_path: str) -> str:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Audio file not found: {file_path}")
         
-        # Load model
-        model, class_names = _load_yamnet_model()
-        
-        # Load and preprocess audio
-        audio_data, sr = librosa.load(file_path, sr=16000)
-        
-        # Check if audio is not empty
-        if len(audio_data) == 0:
-            raise ValueError("Audio file is empty")
-        
-        # Convert to float32 and ensure proper shape
-        waveform = np.array(audio_data, dtype=np.float32)
-        
-        # Run inference
-        scores, embeddings, spectrogram = model(waveform)
-        
-        # Get top class
-        top_class = tf.argmax(tf.reduce_mean(scores, axis=0)).numpy()
-        
-        # Get confidence score
-        confidence = tf.reduce_max(tf.reduce_mean(scores, axis=0)).numpy()
-        
-        # Get class name
-        if top_class < len(class_names):
-            class_name = class_names[top_class]
-        else:
-            class_name = "Unknown"
-        
-        # Log results
-        st.info(f"Detection confidence: {confidence:.2f}")
+        # Reuse scores from an earlier analysis of the same content
+        cache_path = _score_cache_path(file_path)
+        scores = _read_cached_scores(cache_path)
+        if scores is None:
+            try:
+                sound_file = sf.SoundFile(file_path)
+            except RuntimeError:
+                sound_file = None
+            
+            # Streaming resampling needs soxr; 16 kHz files need no resampler at all
+            if sound_file is not None and not (SOXR_AVAILABLE or sound_file.samplerate == 16000):
+                sound_file.close()
+                sound_file = None
+            
+            if sound_file is not None:
+                # Decode, resample and classify window by window
+                with sound_file:
+                    scores = _stream_mean_scores(sound_file)[np.newaxis, :]
+            else:
+                # Formats libsndfile can't stream fall back to a full decode
+                audio_data, sr = load_audio(file_path)
+                scores = _yamnet_scores(audio_data, sr)
+            
+            _write_cached_scores(cache_path, scores)
+            _evict_score_cache()
         
-        return class_name
+        _, class_names = _get_yamnet()
+        return _label_from_scores(scores, class_names)
         
     except Exception as e:
         st.error(f"Audio analysis failed: {e}")
         return "Analysis failed"
 
-def get_audio_metadata(file_path: str) -> dict:
+def _analyze_audio_from_array(audio_data: np.ndarray, sr: int) -> str:
+    """Run YAMNet on already-loaded audio (see analyze_audio)"""
+    _, class_names = _get_yamnet()
+    return _label_from_scores(_yamnet_scores(audio_data, sr), class_names)
+
+def _yamnet_scores(audio_data: np.ndarray, sr: int) -> np.ndarray:
+    """Per-window YAMNet class scores of shape (n_windows, n_classes)"""
+    # Load model
+    interpreter, _ = _get_yamnet()
+    
+    # YAMNet expects 16 kHz input
+    audio_data = resample_audio(audio_data, sr)
+    
+    # Check if audio is not empty
+    if len(audio_data) == 0:
+        raise ValueError("Audio file is empty")
+    
+    # Ensure contiguous float32 (no copy when the loader already produced it)
+    waveform = np.ascontiguousarray(audio_data, dtype=np.float32)
+    
+    # Run inference window by window
+    return np.stack(list(_invoke_windows(_frame_waveform(waveform))))
+
+def _invoke_windows(windows):
+    """Yield YAMNet class scores for each 15600-sample window"""
+    interpreter, _ = _get_yamnet()
+    input_index = interpreter.get_input_details()[0]['index']
+    output_index = interpreter.get_output_details()[0]['index']
+    for window in windows:
+        with _yamnet_lock:
+            np.copyto(_INPUT_BUF, window)
+            interpreter.set_tensor(input_index, _INPUT_BUF)
+            interpreter.invoke()
+            scores = interpreter.get_tensor(output_index).reshape(-1)
+        yield scores
+
+def _stream_windows(sound_file: sf.SoundFile):
     """
-    Get basic audio metadata
+    Yield 16 kHz YAMNet windows while decoding the file block by block
+    
+    The same window buffer is reused for every yield, so consumers must be
+    done with it before advancing the generator.
     
     Args:
-        file_path: Path to audio file
-        
-    Returns:
-        Dictionary with audio metadata
+        sound_file: Open sound file to read from
     """
+    orig_sr = sound_file.samplerate
+    resampler = None
+    if orig_sr != 16000:
+        resampler = soxr.ResampleStream(orig_sr, 16000, 1, dtype='float32')
+    
+    window = np.zeros(YAMNET_WINDOW_SAMPLES, dtype=np.float32)
+    fill = 0
+    total = 0
+    
+    def push(samples):
+        nonlocal fill, total
+        total += len(samples)
+        pos = 0
+        while pos < len(samples):
+            take = min(YAMNET_WINDOW_SAMPLES - fill, len(samples) - pos)
+            window[fill:fill + take] = samples[pos:pos + take]
+            fill += take
+            pos += take
+            if fill == YAMNET_WINDOW_SAMPLES:
+                yield window
+                fill = 0
+    
+    # Read roughly one 16 kHz window's worth of source samples per block
+    blocksize = max(1, YAMNET_WINDOW_SAMPLES * orig_sr // 16000)
+    for block in sound_file.blocks(blocksize=blocksize, dtype='float32', always_2d=True):
+        samples = block.mean(axis=1) if block.shape[1] > 1 else np.ascontiguousarray(block[:, 0])
+        if resampler is not None:
+            samples = resampler.resample_chunk(samples)
+        yield from push(samples)
+    
+    if resampler is not None:
+        yield from push(resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True))
+    
+    # Check if audio is not empty
+    if total == 0:
+        raise ValueError("Audio file is empty")
+    
+    # Zero-pad the trailing partial window
+    if fill > 0:
+        window[fill:] = 0.0
+        yield window
+
+def _stream_mean_scores(sound_file: sf.SoundFile) -> np.ndarray:
+    """Running mean of YAMNet scores over a streamed file"""
+    mean_scores = None
+    for n, scores in enumerate(_invoke_windows(_stream_windows(sound_file)), start=1):
+        if mean_scores is None:
+            mean_scores = scores.astype(np.float64)
+        else:
+            mean_scores += (scores - mean_scores) / n
+    return mean_scores
+
+def _label_from_scores(scores: np.ndarray, class_names) -> str:
+    """Pick the top class from per-window scores and report its confidence"""
+    # Average over windows once, then take top class and its confidence
+    mean_scores = np.mean(scores, axis=0)
+    top_class = int(mean_scores.argmax())
+    confidence = float(mean_scores[top_class])
+    
+    # Get class name
+    if top_class < len(class_names):
+        class_name = str(class_names[top_class])
+    else:
+        class_name = "Unknown"
+    
+    # Log results
+    st.info(f"Detection confidence: {confidence:.2f}")
+    
+    return class_name
+
+def _score_cache_path(file_path: str) -> str:
+    """Temp-dir location of cached YAMNet scores, keyed on the file's content hash"""
+    digest = hashlib.blake2b(digest_size=8)
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return os.path.join(tempfile.gettempdir(), f'yamnet_{digest.hexdigest()}.npz')
+
+def _read_cached_scores(cache_path: str) -> Optional[np.ndarray]:
+    """Cached scores, or None on a miss (including files evicted or replaced mid-read)"""
     try:
-        audio_data, sr = librosa.load(file_path, sr=None)
-        
-        duration = len(audio_data) / sr
-        rms = np.sqrt(np.mean(audio_data**2))
-        db = 20 * np.log10(max(rms, 1e-10))
-        
-        return {
-            'duration': duration,
-            'sample_rate': sr,
-            'rms': rms,
-            'db': db,
-            'samples': len(audio_data)
-        }
-    except Exception as e:
-        st.error(f"Failed to get audio metadata: {e}")
-        return {}
+        with np.load(cache_path) as cached:
+            scores = cached['scores']
+        os.utime(cache_path)
+    except (FileNotFoundError, EOFError, zipfile.BadZipFile, ValueError, KeyError):
+        return None
+    return scores
+
+def _write_cached_scores(cache_path: str, scores: np.ndarray):
+    """Write scores to a temp file and move it into place, so readers never see a partial file"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), prefix='yamnet_', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez_compressed(f, scores=scores)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # The cache is best-effort; the scores are already computed
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _cache_mtime(path: str) -> float:
+    """mtime for LRU ordering; files another session already removed sort first"""
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+def _evict_score_cache():
+    """Drop the least recently used score files beyond YAMNET_SCORE_CACHE_SIZE"""
+    cached = glob.glob(os.path.join(tempfile.gettempdir(), 'yamnet_*.npz'))
+    if len(cached) <= YAMNET_SCORE_CACHE_SIZE:
+        return
+    cached.sort(key=_cache_mtime)
+    for path in cached[:-YAMNET_SCORE_CACHE_SIZE]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def _is_batch_input(input_details: dict) -> bool:
+    """Whether the model input is (batch, 15600) with a resizable batch dimension"""
+    shape = input_details.get('shape_signature', input_details['shape'])
+    return len(shape) == 2 and shape[0] in (-1, 1) and shape[1] == YAMNET_WINDOW_SAMPLES
 
-def analyze_audio_quality(file_path: str) -> dict:
+def analyze_audio_batch(file_paths: List[str]) -> List[str]:
     """
-    Analyze audio quality metrics
+    Analyze several audio files with a single YAMNet invocation
     
     Args:
-        file_path: Path to audio file
+        file_paths: Paths to audio files
         
     Returns:
-        Dictionary with quality metrics
+        Detected environment type for each file, in order
     """
     try:
-        audio_data, sr = librosa.load(file_path, sr=None)
-        
-        # Calculate various metrics
-        rms = np.sqrt(np.mean(audio_data**2))
-        db = 20 * np.log10(max(rms, 1e-10))
-        
-        # Spectral centroid (brightness)
-        spectral_centroid = np.mean(librosa.feature.spectral_centroid(y=audio_data, sr=sr))
+        interpreter, class_names = _get_yamnet()
         
-        # Spectral rolloff (high frequency content)
-        spectral_rolloff = np.mean(librosa.feature.spectral_rolloff(y=audio_data, sr=sr))
-        
-        # Zero crossing rate (noisiness)
-        zcr = np.mean(librosa.feature.zero_crossing_rate(audio_data))
+        # Frame every file into YAMNet windows, remembering where each one starts
+        windows = []
+        offsets = [0]
+        for file_path in file_paths:
+            if not os.path.exists(file_path):
+                raise FileNotFoundError(f"Audio file not found: {file_path}")
+            
+            audio_data, sr = load_audio(file_path)
+            audio_data = resample_audio(audio_data, sr)
+            if len(audio_data) == 0:
+                raise ValueError(f"Audio file is empty: {file_path}")
+            
+            framed = _frame_waveform(audio_data)
+            windows.append(framed)
+            offsets.append(offsets[-1] + len(framed))
         
-        # Quality assessment
-        quality_score = 0
-        quality_notes = []
+        if not windows:
+            return []
+        batch = np.concatenate(windows)
         
-        if db > -30:
-            quality_score += 1
-            quality_notes.append("Good signal level")
-        elif db < -60:
-            quality_notes.append("Very low signal level")
+        # Run every window of every file in one invoke when the graph takes a
+        # (batch, 15600) input. The published classifier declares a rank-1
+        # [15600] input and frames along axis 0, so a stacked batch would not
+        # give one score row per window; it is run window by window instead
+        input_details = interpreter.get_input_details()[0]
+        if _is_batch_input(input_details):
+            output_index = interpreter.get_output_details()[0]['index']
+            with _yamnet_lock:
+                interpreter.resize_tensor_input(input_details['index'], batch.shape)
+                interpreter.allocate_tensors()
+                try:
+                    interpreter.set_tensor(input_details['index'], batch)
+                    interpreter.invoke()
+                    scores = interpreter.get_tensor(output_index)
+                finally:
+                    # Restore the single-window plan used by analyze_audio
+                    interpreter.resize_tensor_input(input_details['index'], input_details['shape'])
+                    interpreter.allocate_tensors()
         else:
-            quality_notes.append("Moderate signal level")
+            scores = np.stack(list(_invoke_windows(batch)))
         
-        if zcr < 0.1:
-            quality_score += 1
-            quality_notes.append("Low noise")
-        elif zcr > 0.3:
-            quality_notes.append("High noise detected")
-        else:
-            quality_notes.append("Moderate noise")
+        if scores.ndim != 2 or scores.shape[0] != len(batch):
+            raise ValueError(
+                f"YAMNet returned scores of shape {scores.shape} for {len(batch)} windows"
+            )
+        
+        # Split scores back per file and pick the top class
+        labels = []
+        for start, end in zip(offsets[:-1], offsets[1:]):
+            top_class = int(np.argmax(scores[start:end].mean(axis=0)))
+            labels.append(str(class_names[top_class]) if top_class < len(class_names) else "Unknown")
         
-        return {
-            'rms': rms,
-            'db': db,
-            'spectral_centroid': spectral_centroid,
-            'spectral_rolloff': spectral_rolloff,
-            'zero_crossing_rate': zcr,
-            'quality_score': quality_score,
-            'quality_notes': quality_notes
-        }
+        return labels
         
     except Exception as e:
-        st.error(f"Failed to analyze audio quality: {e}")
-        return {}
\ No newline at end of file
+        st.error(f"Batch audio analysis failed: {e}")
+        return ["Analysis failed"] * len(file_paths)
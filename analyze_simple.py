@@ -1,9 +1,156 @@
 import numpy as np
 import librosa
+import soundfile as sf
+from numba import njit
 import os
-from typing import Optional, Dict
+import math
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Dict, Tuple
 import streamlit as st
 
+# soxr is much faster; scipy's polyphase resampler is the fallback
+try:
+    import soxr
+    SOXR_AVAILABLE = True
+except ImportError:
+    from scipy.signal import resample_poly
+    SOXR_AVAILABLE = False
+
+# Background pool for decoding/feature extraction (soundfile and numpy release the GIL)
+_IO_POOL = ThreadPoolExecutor(max_workers=2)
+
+# Classification table: rows are spectral centroid bands (<=1 kHz, <=2 kHz, above),
+# columns split each band on zero crossing rate
+_CENTROID_BINS = np.array([1000., 2000.])
+_ZCR_BINS_PER_ROW = [np.array([0.05]), np.array([0.15]), np.array([0.1])]
+# Which column a ZCR exactly on a threshold falls in: the low band splits on
+# zcr < 0.05, the others on zcr > threshold
+_ZCR_SIDE_PER_ROW = ['right', 'left', 'left']
+_LABEL_TABLE = [
+    ["Low-frequency ambient (e.g., traffic, wind)", "Mixed ambient sounds"],
+    ["Music or tonal sounds", "Speech or conversation"],
+    ["High-frequency sounds (e.g., birds, alarms)", "High-frequency noise (e.g., machinery, electronics)"],
+]
+
+def _file_key(file_path: str) -> Tuple[float, int]:
+    """(mtime, size) of a file, used to invalidate caches when it is replaced"""
+    stat = os.stat(file_path)
+    return stat.st_mtime, stat.st_size
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _load_audio(file_path: str, mtime: float, size: int) -> Tuple[np.ndarray, int]:
+    """Decode audio at its native sample rate (cached on path + mtime + size)"""
+    try:
+        audio_data, sr = sf.read(file_path, dtype='float32', always_2d=False)
+    except RuntimeError:
+        # Formats libsndfile can't decode (e.g. M4A) go through librosa/audioread
+        return librosa.load(file_path, sr=None)
+    
+    # Mix down to mono
+    if audio_data.ndim > 1:
+        audio_data = audio_data.mean(axis=1)
+    
+    return audio_data, sr
+
+def load_audio(file_path: str) -> Tuple[np.ndarray, int]:
+    """
+    Load audio once and reuse it across analysis calls
+    
+    Args:
+        file_path: Path to audio file
+        
+    Returns:
+        Tuple of (audio data, sample rate)
+    """
+    return _load_audio(file_path, *_file_key(file_path))
+
+def load_audio_async(file_path: str) -> Future:
+    """
+    Start loading audio in the background (see load_audio)
+    
+    Args:
+        file_path: Path to audio file
+        
+    Returns:
+        Future resolving to a tuple of (audio data, sample rate)
+    """
+    return _IO_POOL.submit(load_audio, file_path)
+
+def resample_audio(audio_data: np.ndarray, orig_sr: int, target_sr: int = 16000) -> np.ndarray:
+    """
+    Resample audio, returning it untouched when it is already at target_sr
+    
+    Args:
+        audio_data: Audio samples
+        orig_sr: Sample rate of audio_data
+        target_sr: Sample rate to convert to
+        
+    Returns:
+        Resampled audio samples
+    """
+    if orig_sr == target_sr:
+        return audio_data
+    if SOXR_AVAILABLE:
+        return soxr.resample(audio_data, orig_sr, target_sr)
+    g = math.gcd(int(orig_sr), int(target_sr))
+    return resample_poly(audio_data, target_sr // g, orig_sr // g).astype(np.float32, copy=False)
+
+def _rms(audio_data: np.ndarray) -> float:
+    """Root-mean-square level in a single dot-product pass"""
+    if audio_data.size == 0:
+        return 0.0
+    return math.sqrt(float(np.dot(audio_data, audio_data)) / audio_data.size)
+
+def _spectral_features(audio_data: np.ndarray, sr: int,
+                       n_fft: int = 2048, hop_length: int = 512) -> Tuple[float, float]:
+    """
+    Mean spectral centroid and rolloff from a single shared STFT
+    
+    Args:
+        audio_data: Audio samples
+        sr: Sample rate
+        n_fft: FFT size
+        hop_length: Hop length between frames
+        
+    Returns:
+        Tuple of (spectral centroid, spectral rolloff) in Hz
+    """
+    S = np.abs(librosa.stft(audio_data, n_fft=n_fft, hop_length=hop_length))
+    freqs = librosa.fft_frequencies(sr=sr, n_fft=n_fft)
+    
+    # Centroid: magnitude-weighted mean frequency per frame
+    frame_energy = S.sum(axis=0)
+    centroid = (freqs[:, None] * S).sum(axis=0) / (frame_energy + 1e-10)
+    
+    # Rolloff: first bin holding 85% of the frame's cumulative energy
+    cumulative = np.cumsum(S, axis=0)
+    rolloff_bins = (cumulative < 0.85 * cumulative[-1]).sum(axis=0)
+    rolloff = freqs[np.minimum(rolloff_bins, len(freqs) - 1)]
+    
+    return float(np.mean(centroid)), float(np.mean(rolloff))
+
+@njit(cache=True, fastmath=True)
+def _zcr_mean(audio_data, frame_length=2048, hop_length=512):
+    """Mean per-frame zero crossing rate in one compiled pass over the signal"""
+    n_samples = len(audio_data)
+    if n_samples < 2:
+        return 0.0
+    if n_samples < frame_length:
+        frame_length = n_samples
+    n_frames = 1 + (n_samples - frame_length) // hop_length
+    
+    acc = 0.0
+    for i in range(n_frames):
+        start = i * hop_length
+        prev = audio_data[start] >= 0
+        crossings = 0
+        for j in range(start + 1, start + frame_length):
+            cur = audio_data[j] >= 0
+            crossings += prev != cur
+            prev = cur
+        acc += crossings / (frame_length - 1)
+    return acc / n_frames
+
 def analyze_audio_simple(file_path: str) -> str:
     """
     Simple audio analysis without YAMNet
@@ -19,44 +166,47 @@ def analyze_audio_simple(file_path: str) -> str:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Audio file not found: {file_path}")
         
-        # Load and preprocess audio
-        audio_data, sr = librosa.load(file_path, sr=16000)
-        
-        # Check if audio is not empty
-        if len(audio_data) == 0:
-            raise ValueError("Audio file is empty")
-        
-        # Basic analysis
-        rms = np.sqrt(np.mean(audio_data**2))
-        db = 20 * np.log10(max(rms, 1e-10))
-        
-        # Spectral centroid (brightness)
-        spectral_centroid = np.mean(librosa.feature.spectral_centroid(y=audio_data, sr=sr))
-        
-        # Zero crossing rate (noisiness)
-        zcr = np.mean(librosa.feature.zero_crossing_rate(audio_data))
-        
-        # Simple classification based on audio characteristics
-        if spectral_centroid > 2000:
-            if zcr > 0.1:
-                return "High-frequency noise (e.g., machinery, electronics)"
-            else:
-                return "High-frequency sounds (e.g., birds, alarms)"
-        elif spectral_centroid > 1000:
-            if zcr > 0.15:
-                return "Speech or conversation"
-            else:
-                return "Music or tonal sounds"
-        else:
-            if zcr < 0.05:
-                return "Low-frequency ambient (e.g., traffic, wind)"
-            else:
-                return "Mixed ambient sounds"
+        audio_data, sr = load_audio(file_path)
+        return analyze_audio_simple_from_array(audio_data, sr)
         
     except Exception as e:
         st.error(f"Audio analysis failed: {e}")
         return "Analysis failed"
 
+def analyze_audio_simple_from_array(audio_data: np.ndarray, sr: int) -> str:
+    """
+    Classify already-loaded audio (see analyze_audio_simple)
+    
+    Args:
+        audio_data: Audio samples
+        sr: Sample rate
+        
+    Returns:
+        Basic audio classification
+    """
+    # Analysis runs at 16 kHz
+    audio_data = resample_audio(audio_data, sr)
+    sr = 16000
+    
+    # Check if audio is not empty
+    if len(audio_data) == 0:
+        raise ValueError("Audio file is empty")
+    
+    # Spectral centroid (brightness)
+    spectral_centroid, _ = _spectral_features(audio_data, sr)
+    
+    # Zero crossing rate (noisiness)
+    zcr = _zcr_mean(audio_data)
+    
+    # Simple classification based on audio characteristics
+    return _classify(spectral_centroid, zcr)
+
+def _classify(spectral_centroid: float, zcr: float) -> str:
+    """Look up the environment label for a spectral centroid and zero crossing rate"""
+    row = int(np.searchsorted(_CENTROID_BINS, spectral_centroid))
+    col = int(np.searchsorted(_ZCR_BINS_PER_ROW[row], zcr, side=_ZCR_SIDE_PER_ROW[row]))
+    return _LABEL_TABLE[row][col]
+
 def get_audio_metadata(file_path: str) -> Dict:
     """
     Get basic audio metadata
@@ -68,23 +218,39 @@ def get_audio_metadata(file_path: str) -> Dict:
         Dictionary with audio metadata
     """
     try:
-        audio_data, sr = librosa.load(file_path, sr=None)
-        
-        duration = len(audio_data) / sr
-        rms = np.sqrt(np.mean(audio_data**2))
-        db = 20 * np.log10(max(rms, 1e-10))
-        
-        return {
-            'duration': duration,
-            'sample_rate': sr,
-            'rms': rms,
-            'db': db,
-            'samples': len(audio_data)
-        }
+        return _cached_audio_metadata(file_path, *_file_key(file_path))
     except Exception as e:
         st.error(f"Failed to get audio metadata: {e}")
         return {}
 
+@st.cache_data(max_entries=16, show_spinner=False)
+def _cached_audio_metadata(file_path: str, mtime: float, size: int) -> Dict:
+    """Metadata for one version of a file (cached on path + mtime + size)"""
+    return get_audio_metadata_from_array(*load_audio(file_path))
+
+def get_audio_metadata_from_array(audio_data: np.ndarray, sr: int) -> Dict:
+    """
+    Compute metadata for already-loaded audio (see get_audio_metadata)
+    
+    Args:
+        audio_data: Audio samples
+        sr: Sample rate
+        
+    Returns:
+        Dictionary with audio metadata
+    """
+    duration = len(audio_data) / sr
+    rms = _rms(audio_data)
+    db = 20.0 * math.log10(rms + 1e-10)
+    
+    return {
+        'duration': duration,
+        'sample_rate': sr,
+        'rms': rms,
+        'db': db,
+        'samples': len(audio_data)
+    }
+
 def analyze_audio_quality(file_path: str) -> Dict:
     """
     Analyze audio quality metrics
@@ -96,54 +262,81 @@ def analyze_audio_quality(file_path: str) -> Dict:
         Dictionary with quality metrics
     """
     try:
-        audio_data, sr = librosa.load(file_path, sr=None)
-        
-        # Calculate various metrics
-        rms = np.sqrt(np.mean(audio_data**2))
-        db = 20 * np.log10(max(rms, 1e-10))
-        
-        # Spectral centroid (brightness)
-        spectral_centroid = np.mean(librosa.feature.spectral_centroid(y=audio_data, sr=sr))
+        return _cached_audio_quality(file_path, *_file_key(file_path))
         
-        # Spectral rolloff (high frequency content)
-        spectral_rolloff = np.mean(librosa.feature.spectral_rolloff(y=audio_data, sr=sr))
-        
-        # Zero crossing rate (noisiness)
-        zcr = np.mean(librosa.feature.zero_crossing_rate(audio_data))
-        
-        # Quality assessment
-        quality_score = 0
-        quality_notes = []
-        
-        if db > -30:
-            quality_score += 1
-            quality_notes.append("Good signal level")
-        elif db < -60:
-            quality_notes.append("Very low signal level")
-        else:
-            quality_notes.append("Moderate signal level")
-        
-        if zcr < 0.1:
-            quality_score += 1
-            quality_notes.append("Low noise")
-        elif zcr > 0.3:
-            quality_notes.append("High noise detected")
-        else:
-            quality_notes.append("Moderate noise")
+    except Exception as e:
+        st.error(f"Failed to analyze audio quality: {e}")
+        return {}
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _cached_audio_quality(file_path: str, mtime: float, size: int) -> Dict:
+    """Quality metrics for one version of a file (cached on path + mtime + size)"""
+    return analyze_audio_quality_from_array(*load_audio(file_path))
+
+def analyze_audio_quality_from_array(audio_data: np.ndarray, sr: int,
+                                     rms: Optional[float] = None) -> Dict:
+    """
+    Compute quality metrics for already-loaded audio (see analyze_audio_quality)
+    
+    Args:
+        audio_data: Audio samples
+        sr: Sample rate
+        rms: Known RMS level to reuse, computed when omitted
         
+    Returns:
+        Dictionary with quality metrics
+    """
+    # Calculate signal level first: silent input needs no spectral analysis
+    if rms is None:
+        rms = _rms(audio_data)
+    db = 20.0 * math.log10(rms + 1e-10)
+    
+    if db < -80:
         return {
             'rms': rms,
             'db': db,
-            'spectral_centroid': spectral_centroid,
-            'spectral_rolloff': spectral_rolloff,
-            'zero_crossing_rate': zcr,
-            'quality_score': quality_score,
-            'quality_notes': quality_notes
+            'spectral_centroid': 0.0,
+            'spectral_rolloff': 0.0,
+            'zero_crossing_rate': 0.0,
+            'quality_score': 0,
+            'quality_notes': ['Silent or empty audio']
         }
-        
-    except Exception as e:
-        st.error(f"Failed to analyze audio quality: {e}")
-        return {}
+    
+    # Spectral centroid (brightness) and rolloff (high frequency content)
+    spectral_centroid, spectral_rolloff = _spectral_features(audio_data, sr)
+    
+    # Zero crossing rate (noisiness)
+    zcr = _zcr_mean(audio_data)
+    
+    # Quality assessment
+    quality_score = 0
+    quality_notes = []
+    
+    if db > -30:
+        quality_score += 1
+        quality_notes.append("Good signal level")
+    elif db < -60:
+        quality_notes.append("Very low signal level")
+    else:
+        quality_notes.append("Moderate signal level")
+    
+    if zcr < 0.1:
+        quality_score += 1
+        quality_notes.append("Low noise")
+    elif zcr > 0.3:
+        quality_notes.append("High noise detected")
+    else:
+        quality_notes.append("Moderate noise")
+    
+    return {
+        'rms': rms,
+        'db': db,
+        'spectral_centroid': spectral_centroid,
+        'spectral_rolloff': spectral_rolloff,
+        'zero_crossing_rate': zcr,
+        'quality_score': quality_score,
+        'quality_notes': quality_notes
+    }
 
 # Alias for compatibility
-analyze_audio = analyze_audio_simple 
\ No newline at end of file
+analyze_audio = analyze_audio_simple
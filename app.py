@@ -1,7 +1,10 @@
 import streamlit as st
 import os
 import time
-from record import record_audio, get_available_microphones, get_default_microphone_index, test_microphone
+from record import (
+    record_audio, get_available_microphones, refresh_microphones,
+    get_default_microphone_index, test_microphone
+)
 from analyze_simple import analyze_audio, get_audio_metadata, analyze_audio_quality
 from granular_synth import GranularSynthesizer
 import threading
@@ -88,6 +91,8 @@ with st.sidebar:
     
     # Microphone selection
     st.subheader("Microphone Input")
+    if st.button("🔄 Refresh Devices"):
+        refresh_microphones()
     microphones = get_available_microphones()
     mic_options = [f"{m['name']} (ch: {m['channels']})" for m in microphones]
     default_mic_idx = 0
@@ -2,12 +2,31 @@ import streamlit as st
 import os
 import time
 import tempfile
-from analyze_simple import analyze_audio, get_audio_metadata, analyze_audio_quality
+from analyze_simple import (
+    load_audio_async, analyze_audio_simple_from_array,
+    get_audio_metadata_from_array, analyze_audio_quality_from_array
+)
 from granular_synth import GranularSynthesizer
 
+# Reruns on every widget change would otherwise redo the analysis each time.
+# Results are keyed on the file path, mtime and size; the waveform itself is
+# passed unhashed (leading underscore) since it is determined by that file.
+@st.cache_data(max_entries=16, show_spinner=False)
+def _cached_metadata(path: str, mtime: float, size: int, _audio, sr: int) -> dict:
+    """Metadata for one version of an audio file"""
+    return get_audio_metadata_from_array(_audio, sr)
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _cached_quality(path: str, mtime: float, size: int, _audio, sr: int, rms: float) -> dict:
+    """Quality metrics for one version of an audio file"""
+    return analyze_audio_quality_from_array(_audio, sr, rms)
+
 # Try to import recording modules, with fallback for web deployment
 try:
-    from record import record_audio, get_available_microphones, get_default_microphone_index, test_microphone
+    from record import (
+        record_audio, get_available_microphones, refresh_microphones,
+        get_default_microphone_index, test_microphone
+    )
     RECORDING_AVAILABLE = True
 except ImportError:
     RECORDING_AVAILABLE = False
@@ -92,6 +111,8 @@ with st.sidebar:
         
         # Microphone selection
         st.subheader("Microphone Input")
+        if st.button("🔄 Refresh Devices"):
+            refresh_microphones()
         microphones = get_available_microphones()
         mic_options = [f"{m['name']} (ch: {m['channels']})" for m in microphones]
         default_mic_idx = 0
@@ -170,8 +191,9 @@ with col1:
                     meter_callback=update_meter
                 )
                 
-                # Store filename in session state
+                # Store filename in session state and start decoding it
                 st.session_state.recorded_file = filename
+                st.session_state.audio_future = load_audio_async(filename)
                 
                 with status_placeholder.container():
                     st.success("✅ Recording completed!")
@@ -189,13 +211,23 @@ with col1:
         )
         
         if uploaded_file is not None:
-            # Save uploaded file
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                tmp_file_path = tmp_file.name
-            
-            # Store file path in session state
-            st.session_state.recorded_file = tmp_file_path
+            # Save and start decoding each upload once; reruns reuse the file
+            # and the decode (file_id is new for every upload, even of the same file)
+            if st.session_state.get('upload_key') != uploaded_file.file_id:
+                with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
+                    tmp_file.write(uploaded_file.getvalue())
+                    tmp_file_path = tmp_file.name
+                
+                # Drop the previous upload's temp file
+                previous_upload = st.session_state.get('upload_file')
+                if previous_upload and os.path.exists(previous_upload):
+                    os.remove(previous_upload)
+                
+                # Store file path in session state and decode it while the page renders
+                st.session_state.upload_key = uploaded_file.file_id
+                st.session_state.upload_file = tmp_file_path
+                st.session_state.recorded_file = tmp_file_path
+                st.session_state.audio_future = load_audio_async(tmp_file_path)
             
             st.success(f"✅ Audio file uploaded: {uploaded_file.name}")
             
@@ -205,14 +237,30 @@ with col1:
 # Display recorded audio if available
 if hasattr(st.session_state, 'recorded_file') and os.path.exists(st.session_state.recorded_file):
     with col1:
+        # Reuse the decode started on upload/record, or start one now
+        audio_future = st.session_state.get('audio_future')
+        if audio_future is None:
+            audio_future = load_audio_async(st.session_state.recorded_file)
+            st.session_state.audio_future = audio_future
+        
         st.header("🎵 Audio Analysis")
         
         # Audio player for recorded files
         if not input_method == "📁 Upload File":
             st.audio(st.session_state.recorded_file)
         
+        # Decode once and share the waveform with every analysis below
+        try:
+            audio_data, audio_sr = audio_future.result()
+        except Exception as e:
+            st.error(f"Failed to load audio: {e}")
+            audio_data, audio_sr = None, None
+        
         # Audio metadata
-        metadata = get_audio_metadata(st.session_state.recorded_file)
+        audio_stat = os.stat(st.session_state.recorded_file)
+        audio_key = (st.session_state.recorded_file, audio_stat.st_mtime, audio_stat.st_size)
+        metadata = _cached_metadata(*audio_key, audio_data, audio_sr) if audio_data is not None else {}
+        
         if metadata:
             st.subheader("📊 Audio Info")
             col_info1, col_info2 = st.columns(2)
@@ -224,7 +272,11 @@ if hasattr(st.session_state, 'recorded_file') and os.path.exists(st.session_stat
                 st.metric("dB Level", f"{metadata['db']:.1f} dB")
         
         # Quality analysis
-        quality = analyze_audio_quality(st.session_state.recorded_file)
+        try:
+            quality = _cached_quality(*audio_key, audio_data, audio_sr, metadata['rms']) if metadata else {}
+        except Exception as e:
+            st.error(f"Failed to analyze audio quality: {e}")
+            quality = {}
         if quality:
             st.subheader("🔍 Quality Analysis")
             st.write(f"Quality Score: {quality['quality_score']}/2")
@@ -236,10 +288,10 @@ if hasattr(st.session_state, 'recorded_file') and os.path.exists(st.session_stat
     with col1:
         st.header("🔍 Environment Analysis")
         
-        if st.button("🔍 Analyze Environment", use_container_width=True):
+        if st.button("🔍 Analyze Environment", use_container_width=True, disabled=audio_data is None):
             with st.spinner("Analyzing audio..."):
                 try:
-                    label = analyze_audio(st.session_state.recorded_file)
+                    label = analyze_audio_simple_from_array(audio_data, audio_sr)
                     st.session_state.environment_label = label
                     st.success(f"Detected environment: **{label}**")
                 except Exception as e:
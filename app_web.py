@@ -1,10 +1,32 @@
 import streamlit as st
 import os
 import time
-from analyze_simple import analyze_audio, get_audio_metadata, analyze_audio_quality
-from granular_synth import GranularSynthesizer
 import tempfile
 
+# analyze_simple and granular_synth pull in librosa and numba, which dominate
+# cold start; they are imported where first needed so the page renders at once.
+
+# Reruns on every widget change would otherwise redo the analysis each time.
+# Results are keyed on the file path and mtime; the waveform itself is passed
+# unhashed (leading underscore) since it is determined by that file.
+@st.cache_data(max_entries=16, show_spinner=False)
+def _cached_metadata(path: str, mtime: float, _audio, sr: int) -> dict:
+    """Metadata for one version of an audio file"""
+    from analyze_simple import get_audio_metadata_from_array
+    return get_audio_metadata_from_array(_audio, sr)
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _cached_quality(path: str, mtime: float, _audio, sr: int, rms: float) -> dict:
+    """Quality metrics for one version of an audio file"""
+    from analyze_simple import analyze_audio_quality_from_array
+    return analyze_audio_quality_from_array(_audio, sr, rms)
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _cached_environment(path: str, mtime: float, _audio, sr: int) -> str:
+    """Environment label for one version of an audio file"""
+    from analyze_simple import analyze_audio_simple_from_array
+    return analyze_audio_simple_from_array(_audio, sr)
+
 # Page configuration
 st.set_page_config(
     page_title="Valanche Ambience Recorder", 
@@ -100,13 +122,29 @@ with col1:
     )
     
     if uploaded_file is not None:
-        # Save uploaded file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
-            tmp_file.write(uploaded_file.getvalue())
-            tmp_file_path = tmp_file.name
-        
-        # Store file path in session state
-        st.session_state.recorded_file = tmp_file_path
+        # Save and decode each upload once; reruns reuse the file and waveform
+        # (file_id is new for every upload, even of a same-named, same-sized file)
+        upload_key = uploaded_file.file_id
+        if st.session_state.get('upload_key') != upload_key:
+            with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
+                tmp_file.write(uploaded_file.getvalue())
+                tmp_file_path = tmp_file.name
+            
+            # Drop the previous upload's temp file
+            previous_upload = st.session_state.get('recorded_file')
+            if previous_upload and os.path.exists(previous_upload):
+                os.remove(previous_upload)
+            
+            # Store file path and decoded audio in session state
+            st.session_state.recorded_file = tmp_file_path
+            st.session_state.upload_key = upload_key
+            st.session_state.audio_16k = None
+            try:
+                from analyze_simple import load_audio
+                st.session_state.audio, st.session_state.sr = load_audio(tmp_file_path)
+            except Exception as e:
+                st.error(f"Failed to load audio: {e}")
+                st.session_state.audio, st.session_state.sr = None, None
         
         st.success(f"✅ Audio file uploaded: {uploaded_file.name}")
         
@@ -118,8 +156,13 @@ if hasattr(st.session_state, 'recorded_file') and os.path.exists(st.session_stat
     with col1:
         st.header("🎵 Audio Analysis")
         
+        audio = st.session_state.get('audio')
+        sr = st.session_state.get('sr')
+        audio_path = st.session_state.recorded_file
+        audio_mtime = os.path.getmtime(audio_path)
+        
         # Audio metadata
-        metadata = get_audio_metadata(st.session_state.recorded_file)
+        metadata = _cached_metadata(audio_path, audio_mtime, audio, sr) if audio is not None else {}
         if metadata:
             st.subheader("📊 Audio Info")
             col_info1, col_info2 = st.columns(2)
@@ -131,7 +174,7 @@ if hasattr(st.session_state, 'recorded_file') and os.path.exists(st.session_stat
                 st.metric("dB Level", f"{metadata['db']:.1f} dB")
         
         # Quality analysis
-        quality = analyze_audio_quality(st.session_state.recorded_file)
+        quality = _cached_quality(audio_path, audio_mtime, audio, sr, metadata['rms']) if metadata else {}
         if quality:
             st.subheader("🔍 Quality Analysis")
             st.write(f"Quality Score: {quality['quality_score']}/2")
@@ -143,10 +186,14 @@ if hasattr(st.session_state, 'recorded_file') and os.path.exists(st.session_stat
     with col1:
         st.header("🔍 Environment Analysis")
         
-        if st.button("🔍 Analyze Environment", use_container_width=True):
+        if st.button("🔍 Analyze Environment", use_container_width=True, disabled=audio is None):
             with st.spinner("Analyzing audio..."):
                 try:
-                    label = analyze_audio(st.session_state.recorded_file)
+                    # Classification runs at 16 kHz; resample once per upload and keep it
+                    if st.session_state.get('audio_16k') is None:
+                        from analyze_simple import resample_audio
+                        st.session_state.audio_16k = resample_audio(audio, sr)
+                    label = _cached_environment(audio_path, audio_mtime, st.session_state.audio_16k, 16000)
                     st.session_state.environment_label = label
                     st.success(f"Detected environment: **{label}**")
                 except Exception as e:
@@ -157,9 +204,12 @@ if hasattr(st.session_state, 'recorded_file') and os.path.exists(st.session_stat
     with col1:
         st.header("🔁 Generate Loop")
         
-        if st.button("🎵 Generate Granular Loop", type="secondary", use_container_width=True):
+        if st.button("🎵 Generate Granular Loop", type="secondary", use_container_width=True,
+                     disabled=audio is None):
             with st.spinner("Generating granular loop..."):
                 try:
+                    from granular_synth import GranularSynthesizer
+                    
                     # Initialize granular synthesizer
                     synth = GranularSynthesizer(
                         grain_size_ms=grain_size,
@@ -171,14 +221,14 @@ if hasattr(st.session_state, 'recorded_file') and os.path.exists(st.session_stat
                     loop_filename = f"loop_{int(time.time())}.wav"
                     
                     if synthesis_type == "Granular Loop":
-                        synth.create_granular_loop(
-                            st.session_state.recorded_file,
+                        synth.create_granular_loop_from_array(
+                            audio, sr,
                             loop_filename,
                             loop_duration=loop_duration
                         )
                     else:
-                        synth.create_texture_loop(
-                            st.session_state.recorded_file,
+                        synth.create_texture_loop_from_array(
+                            audio, sr,
                             loop_filename,
                             loop_duration=loop_duration,
                             texture_density=texture_density
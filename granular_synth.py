@@ -1,8 +1,107 @@
 import numpy as np
-import librosa
 import soundfile as sf
+import os
+import math
+import tempfile
+from numba import njit
 from typing import Tuple, Optional
-import random
+
+@njit(fastmath=True, cache=True)
+def _render_grains(audio, output, starts, out_starts, window, grain_size):
+    """
+    Overlap-add windowed grains into output
+    
+    Grain i is audio[starts[i]:starts[i] + grain_size] * window, added at
+    out_starts[i]. Both audio and output must be padded so every grain read
+    and write stays in bounds; the inner loop has no boundary checks. Serial
+    on purpose: concurrent sessions may call it at the same time.
+    """
+    for i in range(len(starts)):
+        src = starts[i]
+        dst = out_starts[i]
+        for j in range(grain_size):
+            output[dst + j] += audio[src + j] * window[j]
+
+def _load_audio(input_file: str) -> Tuple[np.ndarray, int]:
+    """Decode audio as mono float32 at its native sample rate"""
+    try:
+        audio, sr = sf.read(input_file, dtype='float32', always_2d=False)
+    except RuntimeError:
+        # Formats libsndfile can't decode (e.g. MP3/M4A) go through librosa/audioread
+        import librosa
+        return librosa.load(input_file, sr=None)
+    
+    # Mix down to mono
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    
+    return audio, sr
+
+def _rms(audio: np.ndarray) -> float:
+    """Root-mean-square level in a single dot-product pass"""
+    if audio.size == 0:
+        return 0.0
+    return math.sqrt(float(np.dot(audio, audio)) / audio.size)
+
+def _stream_render(raw_path: str, sr: int, total_samples: int, block_size: int,
+                   carry: int, render_block) -> float:
+    """
+    Render a loop block by block into a float scratch file
+    
+    render_block(scratch, block_start) must add every grain starting in
+    [block_start, block_start + block_size) into scratch at its offset from
+    block_start; grains may run up to carry (<= block_size) samples past the
+    block end and are carried into the next block.
+    
+    Returns:
+        Sum of squares of the rendered samples
+    """
+    sum_sq = 0.0
+    scratch = np.zeros(block_size + carry, dtype=np.float32)
+    
+    with sf.SoundFile(raw_path, 'w', samplerate=sr, channels=1, format='WAV', subtype='FLOAT') as raw:
+        for block_start in range(0, total_samples, block_size):
+            render_block(scratch, block_start)
+            
+            block = scratch[:min(block_size, total_samples - block_start)]
+            sum_sq += float(np.dot(block, block))
+            raw.write(block)
+            
+            # Slide the window: keep what spilled past the block, clear the rest
+            scratch[:carry] = scratch[block_size:]
+            scratch[carry:] = 0.0
+    
+    return sum_sq
+
+def _finalize_loop(raw_path: str, output_file: str, sr: int, block_size: int,
+                   scale: float, crossfade_samples: int = 0):
+    """Copy a raw render to output_file as 16-bit PCM, applying gain and crossfade per block"""
+    with sf.SoundFile(raw_path) as raw, \
+            sf.SoundFile(output_file, 'w', samplerate=sr, channels=1, subtype='PCM_16') as out:
+        fade_start = raw.frames - crossfade_samples
+        
+        # The head is blended into the tail so the end flows into the start
+        if crossfade_samples:
+            head = raw.read(crossfade_samples, dtype='float32') * np.float32(scale)
+            raw.seek(0)
+        
+        pos = 0
+        for block in raw.blocks(blocksize=block_size, dtype='float32'):
+            block *= np.float32(scale)
+            
+            # Crossfade the part of this block that lies in the tail
+            lo, hi = max(fade_start, pos), pos + len(block)
+            if crossfade_samples and lo < hi:
+                ramp = (np.arange(lo, hi) - fade_start).astype(np.float32) / (crossfade_samples - 1)
+                tail = block[lo - pos:]
+                np.multiply(tail, 1.0 - ramp, out=tail)
+                ramp *= head[lo - fade_start:hi - fade_start]
+                tail += ramp
+            
+            # Clip to full scale and quantize
+            np.clip(block, -1.0, 1.0, out=block)
+            out.write((block * 32767).astype(np.int16))
+            pos = hi
 
 class GranularSynthesizer:
     def __init__(self, grain_size_ms: int = 100, overlap: float = 0.5, randomize_grains: bool = True):
@@ -17,6 +116,7 @@ class GranularSynthesizer:
         self.grain_size_ms = grain_size_ms
         self.overlap = overlap
         self.randomize_grains = randomize_grains
+        self.rng = np.random.default_rng()
     
     def create_granular_loop(self, input_file: str, output_file: str, 
                            loop_duration: float = 10.0, 
@@ -33,11 +133,32 @@ class GranularSynthesizer:
         Returns:
             Path to the generated loop file
         """
-        # Load audio
-        audio, sr = librosa.load(input_file, sr=None)
+        audio, sr = _load_audio(input_file)
+        return self.create_granular_loop_from_array(audio, sr, output_file,
+                                                    loop_duration=loop_duration,
+                                                    crossfade_duration=crossfade_duration)
+    
+    def create_granular_loop_from_array(self, audio: np.ndarray, sr: int, output_file: str,
+                                        loop_duration: float = 10.0,
+                                        crossfade_duration: float = 0.1) -> str:
+        """
+        Create a seamless loop from already-loaded mono audio
+        
+        Args:
+            audio: Mono audio samples
+            sr: Sample rate of audio
+            output_file: Path to output loop file
+            loop_duration: Duration of the loop in seconds
+            crossfade_duration: Crossfade duration at loop points
+            
+        Returns:
+            Path to the generated loop file
+        """
+        # The whole pipeline runs in float32
+        audio = np.asarray(audio, dtype=np.float32)
         
         # Calculate input RMS for volume matching
-        input_rms = np.sqrt(np.mean(audio**2))
+        input_rms = _rms(audio)
         
         # Convert grain size to samples
         grain_size_samples = int(self.grain_size_ms * sr / 1000)
@@ -47,55 +168,50 @@ class GranularSynthesizer:
         grain_hop = int(grain_size_samples * (1 - self.overlap))
         num_grains = int(samples_needed / grain_hop) + 1
         
-        # Create output array
-        output = np.zeros(samples_needed)
-        
-        # Generate grains
-        for i in range(num_grains):
-            if self.randomize_grains:
-                # Random position within the audio
-                start_pos = random.randint(0, max(0, len(audio) - grain_size_samples))
-            else:
-                # Sequential positions
-                start_pos = (i * grain_size_samples // 2) % max(1, len(audio) - grain_size_samples)
-            
-            # Extract grain
-            end_pos = min(start_pos + grain_size_samples, len(audio))
-            grain = audio[start_pos:end_pos]
-            
-            # Apply window function for smooth transitions
-            window = np.hanning(len(grain))
-            grain = grain * window
+        # Pad the source so every fixed-size grain gather stays in bounds
+        audio_padded = np.concatenate([audio, np.zeros(grain_size_samples, dtype=audio.dtype)])
+        
+        # Grain source positions
+        if self.randomize_grains:
+            # Random positions within the audio
+            starts = self.rng.integers(0, max(0, len(audio) - grain_size_samples) + 1, size=num_grains)
+        else:
+            # Sequential positions, advancing through the source at the output hop
+            starts = (np.arange(num_grains) * grain_hop) % max(1, len(audio) - grain_size_samples)
+        starts = starts.astype(np.int64)
+        
+        # Window each grain for smooth transitions
+        window = np.hanning(grain_size_samples).astype(np.float32)
+        out_starts = np.arange(num_grains, dtype=np.int64) * grain_hop
+        
+        # Render one-second blocks so memory stays bounded for long loops
+        block_size = max(sr, grain_size_samples)
+        
+        def render_block(scratch, block_start):
+            lo, hi = np.searchsorted(out_starts, [block_start, block_start + block_size])
+            _render_grains(audio_padded, scratch, starts[lo:hi], out_starts[lo:hi] - block_start,
+                           window, grain_size_samples)
+        
+        # Crossfade at loop points for seamless looping; a one-sample ramp is the identity
+        crossfade_samples = int(crossfade_duration * sr) if crossfade_duration > 0 else 0
+        if not 1 < crossfade_samples < samples_needed // 2:
+            crossfade_samples = 0
+        
+        fd, raw_path = tempfile.mkstemp(suffix='.wav')
+        os.close(fd)
+        try:
+            sum_sq = _stream_render(raw_path, sr, samples_needed, block_size,
+                                    grain_size_samples, render_block)
             
-            # Position in output
-            output_start = i * grain_hop
-            output_end = min(output_start + len(grain), len(output))
+            # Normalize to match input volume
+            output_rms = math.sqrt(sum_sq / samples_needed) if samples_needed else 0.0
+            scale = input_rms / output_rms if output_rms > 0 else 1.0
             
-            # Add grain to output with overlap-add
-            if output_end <= len(output):
-                output[output_start:output_end] += grain[:output_end - output_start]
-        
-        # Normalize to match input volume
-        output_rms = np.sqrt(np.mean(output**2))
-        if output_rms > 0:
-            output = output * (input_rms / output_rms)
-        
-        # Apply crossfade at loop points for seamless looping
-        if crossfade_duration > 0:
-            crossfade_samples = int(crossfade_duration * sr)
-            if crossfade_samples < len(output) // 2:
-                # Create crossfade at the end
-                fade_out = np.linspace(1.0, 0.0, crossfade_samples)
-                fade_in = np.linspace(0.0, 1.0, crossfade_samples)
-                
-                # Apply fade out at the end
-                output[-crossfade_samples:] *= fade_out
-                
-                # Apply fade in at the beginning and add to the end
-                output[-crossfade_samples:] += output[:crossfade_samples] * fade_in
+            # Save the loop
+            _finalize_loop(raw_path, output_file, sr, block_size, scale, crossfade_samples)
+        finally:
+            os.remove(raw_path)
         
-        # Save the loop
-        sf.write(output_file, output, sr)
         return output_file
     
     def create_texture_loop(self, input_file: str, output_file: str, 
@@ -110,11 +226,29 @@ class GranularSynthesizer:
             loop_duration: Duration of the loop in seconds
             texture_density: Density of grains (0.0 to 1.0)
         """
-        # Load audio
-        audio, sr = librosa.load(input_file, sr=None)
+        audio, sr = _load_audio(input_file)
+        return self.create_texture_loop_from_array(audio, sr, output_file,
+                                                   loop_duration=loop_duration,
+                                                   texture_density=texture_density)
+    
+    def create_texture_loop_from_array(self, audio: np.ndarray, sr: int, output_file: str,
+                                       loop_duration: float = 10.0,
+                                       texture_density: float = 0.7) -> str:
+        """
+        Create a texture-based loop from already-loaded mono audio
+        
+        Args:
+            audio: Mono audio samples
+            sr: Sample rate of audio
+            output_file: Path to output loop file
+            loop_duration: Duration of the loop in seconds
+            texture_density: Density of grains (0.0 to 1.0)
+        """
+        # The whole pipeline runs in float32
+        audio = np.asarray(audio, dtype=np.float32)
         
         # Calculate input RMS for volume matching
-        input_rms = np.sqrt(np.mean(audio**2))
+        input_rms = _rms(audio)
         
         # Smaller grains for texture
         grain_size_samples = int(50 * sr / 1000)  # 50ms grains
@@ -123,40 +257,69 @@ class GranularSynthesizer:
         samples_needed = int(loop_duration * sr)
         num_grains = int(samples_needed * texture_density / grain_size_samples)
         
-        # Create output array
-        output = np.zeros(samples_needed)
+        # Window is shared by every grain
+        window = np.hanning(grain_size_samples).astype(np.float32)
         
-        # Generate overlapping grains
-        for _ in range(num_grains):
-            # Random position and slight pitch variation
-            start_pos = random.randint(0, max(0, len(audio) - grain_size_samples))
-            pitch_factor = random.uniform(0.8, 1.2)
-            
-            # Extract and process grain
-            end_pos = min(start_pos + grain_size_samples, len(audio))
-            grain = audio[start_pos:end_pos]
-            
-            # Apply pitch shift if needed
-            if abs(pitch_factor - 1.0) > 0.01:
-                grain = librosa.effects.pitch_shift(grain, sr=sr, n_steps=12 * np.log2(pitch_factor))
+        # Pitch variation is quantized to a small table of playback rates. A grain
+        # at rate p reads grain_size * p source samples and squeezes them into
+        # grain_size output samples, which shifts pitch by p (and tempo with it).
+        pitch_bins = np.linspace(0.8, 1.2, 16)
+        source_lengths = (grain_size_samples * pitch_bins).astype(int)
+        read_positions = [np.linspace(0, n - 1, grain_size_samples) for n in source_lengths]
+        
+        # Pad the source so every grain read (plus one interpolation neighbour) stays in bounds
+        audio_padded = np.concatenate([audio, np.zeros(source_lengths[-1] + 1, dtype=audio.dtype)])
+        
+        # Draw all random grain parameters up front: slight pitch variation,
+        # source position, and output position
+        pitch_factors = self.rng.uniform(0.8, 1.2, size=num_grains)
+        bin_indices = np.abs(pitch_bins[np.newaxis, :] - pitch_factors[:, np.newaxis]).argmin(axis=1)
+        start_positions = self.rng.integers(0, np.maximum(0, len(audio) - source_lengths[bin_indices]) + 1)
+        output_starts = self.rng.integers(0, max(0, samples_needed - grain_size_samples) + 1, size=num_grains)
+        
+        # Order grains by output position so each block's grains are a contiguous run
+        order = np.argsort(output_starts, kind='stable')
+        bin_indices = bin_indices[order]
+        start_positions = start_positions[order]
+        output_starts = output_starts[order]
+        
+        block_size = max(sr, grain_size_samples)
+        grain_offsets = np.arange(grain_size_samples)
+        
+        def render_block(scratch, block_start):
+            lo, hi = np.searchsorted(output_starts, [block_start, block_start + block_size])
+            block_bins = bin_indices[lo:hi]
+            block_starts = start_positions[lo:hi]
+            block_offsets = output_starts[lo:hi] - block_start
             
-            # Apply window
-            window = np.hanning(len(grain))
-            grain = grain * window
+            # Render one pitch bin at a time: all grains in a bin share the same
+            # read positions, so gather, resample and window are whole-array ops
+            for bin_idx in np.unique(block_bins):
+                in_bin = block_bins == bin_idx
+                
+                # Linear interpolation at the bin's fractional read positions
+                positions = block_starts[in_bin, np.newaxis] + read_positions[bin_idx][np.newaxis, :]
+                base = positions.astype(np.int64)
+                frac = (positions - base).astype(np.float32)
+                grains = audio_padded[base] * (1.0 - frac) + audio_padded[base + 1] * frac
+                grains *= window
+                
+                # Overlap-add into the block
+                np.add.at(scratch, block_offsets[in_bin, np.newaxis] + grain_offsets, grains)
+        
+        fd, raw_path = tempfile.mkstemp(suffix='.wav')
+        os.close(fd)
+        try:
+            sum_sq = _stream_render(raw_path, sr, samples_needed, block_size,
+                                    grain_size_samples, render_block)
             
-            # Random position in output
-            output_start = random.randint(0, max(0, len(output) - len(grain)))
-            output_end = min(output_start + len(grain), len(output))
+            # Normalize to match input volume
+            output_rms = math.sqrt(sum_sq / samples_needed) if samples_needed else 0.0
+            scale = input_rms / output_rms if output_rms > 0 else 1.0
             
-            # Add grain
-            if output_end <= len(output):
-                output[output_start:output_end] += grain[:output_end - output_start]
-        
-        # Normalize to match input volume
-        output_rms = np.sqrt(np.mean(output**2))
-        if output_rms > 0:
-            output = output * (input_rms / output_rms)
+            # Save
+            _finalize_loop(raw_path, output_file, sr, block_size, scale)
+        finally:
+            os.remove(raw_path)
         
-        # Save
-        sf.write(output_file, output, sr)
         return output_file 
\ No newline at end of file
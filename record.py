@@ -4,9 +4,42 @@ import numpy as np
 import os
 import time
 import threading
-from typing import Optional, Callable, List, Dict, Any
+from types import MappingProxyType
+from typing import Optional, Callable, List, Dict, Any, Mapping, Tuple
 import streamlit as st
 
+@st.cache_resource(ttl=60, show_spinner=False)
+def _query_microphones() -> Tuple[Mapping[str, Any], ...]:
+    """
+    Enumerate input devices (cached: device enumeration is slow on some audio stacks)
+    
+    The cached result is shared by every session, so it is read-only;
+    get_available_microphones hands out copies.
+    """
+    devices = sd.query_devices()
+    
+    try:
+        default_input = sd.default.device[0]
+    except Exception:
+        default_input = None
+    
+    microphones = []
+    for i, device in enumerate(devices):
+        if device.get('max_input_channels', 0) > 0:  # Device supports input
+            microphones.append(MappingProxyType({
+                'index': i,
+                'name': device.get('name', f'Device {i}'),
+                'channels': device.get('max_input_channels', 1),
+                'sample_rate': device.get('default_samplerate', 44100),
+                'is_default': i == default_input
+            }))
+    
+    return tuple(microphones)
+
+def refresh_microphones():
+    """Drop the cached device list so the next lookup re-enumerates devices"""
+    _query_microphones.clear()
+
 def get_available_microphones() -> List[Dict[str, Any]]:
     """
     Get list of available microphone devices
@@ -15,20 +48,7 @@ def get_available_microphones() -> List[Dict[str, Any]]:
         List of dictionaries with device info
     """
     try:
-        devices = sd.query_devices()
-        microphones = []
-        
-        for i, device in enumerate(devices):
-            if device.get('max_input_channels', 0) > 0:  # Device supports input
-                microphones.append({
-                    'index': i,
-                    'name': device.get('name', f'Device {i}'),
-                    'channels': device.get('max_input_channels', 1),
-                    'sample_rate': device.get('default_samplerate', 44100),
-                    'is_default': i == sd.default.device[0]
-                })
-        
-        return microphones
+        return [dict(device) for device in _query_microphones()]
     except Exception as e:
         st.error(f"Failed to get microphone list: {e}")
         return []
@@ -49,7 +69,8 @@ class AudioRecorder:
         self.channels = channels
         self.device_index = device_index if device_index is not None else get_default_microphone_index()
         self.is_recording = False
-        self.audio_buffer = []
+        self._buf = None
+        self._write = 0
         self.meter_callback = None
         
     def start_recording(self, duration: int = 15, meter_callback: Optional[Callable] = None) -> str:
@@ -65,7 +86,11 @@ class AudioRecorder:
         """
         self.meter_callback = meter_callback
         self.is_recording = True
-        self.audio_buffer = []
+        
+        # Preallocate the whole take (plus slack for stream start/stop latency),
+        # shaped like the stream's (frames, channels) blocks
+        self._buf = np.zeros((self.samplerate * (duration + 2), self.channels), dtype=np.int16)
+        self._write = 0
         
         filename = f"recorded_{int(time.time())}.wav"
         
@@ -91,13 +116,16 @@ class AudioRecorder:
                 start_time = time.time()
                 while time.time() - start_time < duration and self.is_recording:
                     # Update meter
-                    if self.audio_buffer and self.meter_callback:
+                    if self._write and self.meter_callback:
                         # Calculate RMS for meter
-                        recent_audio = np.array(self.audio_buffer[-int(self.samplerate * 0.1):])  # Last 100ms
+                        write_pos = self._write
+                        recent_audio = self._buf[max(0, write_pos - int(self.samplerate * 0.1)):write_pos]  # Last 100ms
                         if len(recent_audio) > 0:
-                            rms = np.sqrt(np.mean(recent_audio.astype(np.float32)**2))
+                            # Exact integer sum of squares (int64: 100 ms of full-scale int16 overflows int32)
+                            x = recent_audio.reshape(-1).astype(np.int64)
+                            rms = np.sqrt(np.einsum('i,i->', x, x) / x.size)
                             # Convert to dB and normalize to -50 dB to 1 dB range
-                            db = 20 * np.log10(max(rms, 1e-10))
+                            db = 20 * np.log10(rms + 1e-10)
                             # Normalize to 0-1 range: -50 dB = 0, 1 dB = 1
                             normalized_level = max(0, min(1, (db + 50) / 51))
                             self.meter_callback(f"Recording... ({duration - int(time.time() - start_time)}s left)", normalized_level)
@@ -105,8 +133,8 @@ class AudioRecorder:
                     time.sleep(0.1)
                 
                 # Convert buffer to numpy array
-                if self.audio_buffer:
-                    audio_data = np.array(self.audio_buffer, dtype=np.int16)
+                if self._write:
+                    audio_data = self._buf[:self._write]
                     write(filename, self.samplerate, audio_data)
                     
                     if self.meter_callback:
@@ -131,8 +159,10 @@ class AudioRecorder:
             print(f"Audio callback status: {status}")
         
         if self.is_recording:
-            # Store audio data
-            self.audio_buffer.extend(indata.flatten())
+            # Store audio data (one block copy), dropping anything past the preallocated buffer
+            n = min(len(indata), len(self._buf) - self._write)
+            self._buf[self._write:self._write + n] = indata[:n]
+            self._write += n
 
 def record_audio(filename: str = 'recorded.wav', duration: int = 15, 
                 samplerate: int = 44100, device_index: Optional[int] = None,
@@ -166,27 +196,25 @@ def test_microphone(device_index: int, duration: float = 2.0) -> bool:
     
     Args:
         device_index: Device index to test
-        duration: Test duration in seconds
+        duration: Maximum test duration in seconds
         
     Returns:
         True if microphone works, False otherwise
     """
     try:
-        # Record a short test
-        test_audio = sd.rec(
-            int(duration * 44100), 
+        # One short block is enough to tell a live input from a dead one
+        frames = max(1, min(1024, int(duration * 44100)))
+        with sd.InputStream(
             samplerate=44100, 
             channels=1, 
             dtype='int16',
-            device=device_index
-        )
-        sd.wait()
+            device=device_index,
+            blocksize=frames
+        ) as stream:
+            test_audio, _ = stream.read(frames)
         
         # Check if we got any audio data
-        if np.any(test_audio):
-            return True
-        else:
-            return False
+        return bool(np.any(test_audio))
             
     except Exception as e:
         st.error(f"Microphone test failed: {e}")
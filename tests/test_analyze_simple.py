@@ -0,0 +1,36 @@
+import itertools
+
+import pytest
+
+from analyze_simple import _classify
+
+
+def _ladder(spectral_centroid, zcr):
+    """The if/elif classification the lookup table replaced"""
+    if spectral_centroid > 2000:
+        if zcr > 0.1:
+            return "High-frequency noise (e.g., machinery, electronics)"
+        return "High-frequency sounds (e.g., birds, alarms)"
+    elif spectral_centroid > 1000:
+        if zcr > 0.15:
+            return "Speech or conversation"
+        return "Music or tonal sounds"
+    if zcr < 0.05:
+        return "Low-frequency ambient (e.g., traffic, wind)"
+    return "Mixed ambient sounds"
+
+
+@pytest.mark.parametrize(
+    "spectral_centroid, zcr",
+    list(itertools.product(
+        [0.0, 999.9, 1000.0, 1000.1, 1999.9, 2000.0, 2000.1, 8000.0],
+        [0.0, 0.0499, 0.05, 0.0501, 0.0999, 0.1, 0.1001, 0.1499, 0.15, 0.1501, 0.5],
+    )),
+)
+def test_classify_matches_ladder_at_boundaries(spectral_centroid, zcr):
+    assert _classify(spectral_centroid, zcr) == _ladder(spectral_centroid, zcr)
+
+
+def test_classify_low_band_zcr_threshold():
+    assert _classify(500.0, 0.05) == "Mixed ambient sounds"
+    assert _classify(500.0, 0.0499) == "Low-frequency ambient (e.g., traffic, wind)"
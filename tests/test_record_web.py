@@ -0,0 +1,34 @@
+from streamlit.testing.v1 import AppTest
+
+import record_web
+
+
+def _recorder_script():
+    import streamlit as st
+    import record_web
+    
+    component = record_web._RECORDER_COMPONENT
+    if st.session_state.get('_fake_take') is not None:
+        # Stand in for the browser delivering a finished take
+        record_web._RECORDER_COMPONENT = lambda **kwargs: st.session_state['_fake_take']
+    try:
+        st.session_state['_returned_key'] = record_web.record_audio_web(samplerate=16000)
+    finally:
+        record_web._RECORDER_COMPONENT = component
+
+
+def test_record_audio_web_returns_state_key_before_first_take():
+    at = AppTest.from_function(_recorder_script).run()
+    assert not at.exception
+    assert at.session_state['_returned_key'] == record_web.RECORDING_STATE_KEY
+    assert at.session_state[record_web.RECORDING_STATE_KEY] is None
+
+
+def test_record_audio_web_stores_take_bytes():
+    at = AppTest.from_function(_recorder_script)
+    at.session_state['_fake_take'] = b'RIFF\x00\x00\x00\x00WAVE'
+    at.run()
+    assert not at.exception
+    key = at.session_state['_returned_key']
+    assert at.session_state[key] == b'RIFF\x00\x00\x00\x00WAVE'
+